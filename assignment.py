@@ -1,154 +1,202 @@
-import xml.etree.ElementTree as ET
-from datetime import datetime, timedelta
-import json
+from lxml import etree
+import orjson
+from datetime import date, datetime, time, timedelta
+import threading
 from typing import Dict, Any
 
+# Precompiled XPath queries used by parse. Elements are matched at any
+# depth below the AvailRQ root. Scalar fields use string(), which yields
+# "" when missing.
+_LANGUAGE_CODE_XP = etree.XPath(
+    "string(.//source/languageCode)", smart_strings=False
+)
+_PARAMETER_XP = etree.XPath(".//Configuration/Parameters/Parameter")
+_SEARCH_TYPE_XP = etree.XPath(".//SearchType")
+_AVAIL_DESTINATIONS_XP = etree.XPath(".//AvailDestinations")
+_START_DATE_XP = etree.XPath("string(.//StartDate)", smart_strings=False)
+_END_DATE_XP = etree.XPath("string(.//EndDate)", smart_strings=False)
+_OPTIONS_QUOTA_XP = etree.XPath("string(.//optionsQuota)", smart_strings=False)
+_CURRENCY_XP = etree.XPath("string(.//Currency)", smart_strings=False)
+_NATIONALITY_XP = etree.XPath("string(.//Nationality)", smart_strings=False)
+_MARKET_XP = etree.XPath("string(.//Market)", smart_strings=False)
+_PAXES_XP = etree.XPath(".//Paxes")
+
+
+# lxml serialises concurrent use of one parser behind an internal lock,
+# so each thread reuses its own parser to avoid contending for it.
+# parse always hands it UTF-8 bytes, so the encoding is fixed to override
+# any conflicting <?xml encoding=...?> declaration in the request.
+# Entity resolution and network access are disabled, as AvailRQ needs
+# neither and they would expose parse to XXE.
+_PARSER = threading.local()
+
+
+def _get_parser() -> etree.XMLParser:
+    parser = getattr(_PARSER, "parser", None)
+    if parser is None:
+        parser = etree.XMLParser(
+            encoding="utf-8",
+            remove_blank_text=True,
+            resolve_entities=False,
+            no_network=True,
+            collect_ids=False,
+        )
+        _PARSER.parser = parser
+    return parser
+
+
+def _parse_ddmmyyyy(value: str) -> datetime:
+    """Parse a DD/MM/YYYY date without going through strptime"""
+    if not (
+        len(value) == 10
+        and value.isascii()
+        and value[2] == value[5] == "/"
+        and value[0:2].isdigit()
+        and value[3:5].isdigit()
+        and value[6:10].isdigit()
+    ):
+        raise ValueError(f"Invalid date: {value}")
+    return datetime(int(value[6:10]), int(value[3:5]), int(value[0:2]))
+
 
 class ParseAvailRequest:
-    def __init__(self):
-        # Constants as per the logic
-        self.allowed_currencies = {"EUR", "USD", "GBP"}
-        self.allowed_nationalities = {"US", "GB", "CA"}
-        self.allowed_market = {"US", "GB", "CA", "ES"}
-        self.var_filters_cg = {"en", "fr", "de", "es"}
-        self.allowed_room_count = 5
-        # Default values
-        self.default_language = "en"
-        self.default_currency = "EUR"
-        self.default_nationality = "US"
-        self.default_market = "ES"
-        self.allowed_hotel_count = 10
-        self.options_quota = 20
-        self.max_child_age = 5
-        self.allowed_room_guest_count = 5
-
-        self.price = {
-            "net": 132.42,  # Sample net price
-            "currency": "USD",  # Sample currency
-        }
+    # Constants as per the logic
+    ALLOWED_CURRENCIES = frozenset({"EUR", "USD", "GBP"})
+    ALLOWED_NATIONALITIES = frozenset({"US", "GB", "CA"})
+    ALLOWED_MARKET = frozenset({"US", "GB", "CA", "ES"})
+    VAR_FILTERS_CG = frozenset({"en", "fr", "de", "es"})
+    ALLOWED_ROOM_COUNT = 5
+    # Default values
+    DEFAULT_LANGUAGE = "en"
+    DEFAULT_CURRENCY = "EUR"
+    DEFAULT_NATIONALITY = "US"
+    DEFAULT_MARKET = "ES"
+    ALLOWED_HOTEL_COUNT = 10
+    OPTIONS_QUOTA = 20
+    MAX_CHILD_AGE = 5
+    ALLOWED_ROOM_GUEST_COUNT = 5
+
+    PRICE = {
+        "net": 132.42,  # Sample net price
+        "currency": "USD",  # Sample currency
+    }
 
-    def validate_destination(self, search_type, avail_destinations):
+    @classmethod
+    def validate_destination(cls, search_type, avail_destinations):
         if search_type == "Single" and len(avail_destinations) != 1:
             raise ValueError(
                 "If SearchType is 'Single', there must be exactly one destination."
             )
         if (
             search_type == "Multiple"
-            and len(avail_destinations) > self.allowed_hotel_count
+            and len(avail_destinations) > cls.ALLOWED_HOTEL_COUNT
         ):
             raise ValueError(
-                f"If SearchType is 'Multiple', there can be a maximum of {ALLOWED_HOTEL_COUNT} destinations."
+                f"If SearchType is 'Multiple', there can be a maximum of {cls.ALLOWED_HOTEL_COUNT} destinations."
             )
 
-    def validate_user(self, password, username, company_id):
+    @staticmethod
+    def validate_user(password, username, company_id):
         if not (password and username and company_id):
             raise ValueError(
                 "Missing required parameters: password, username, or CompanyID."
             )
 
+    @staticmethod
     def validate_date(start_date, end_date):
         # Date validation
-        if start_date <= datetime.today() + timedelta(days=2):
+        today = datetime.combine(date.today(), time())
+        if start_date <= today + timedelta(days=2):
             raise ValueError("Start date must be at least 2 days after today.")
         if (end_date - start_date).days < 3:
             raise ValueError("Stay duration must be at least 3 nights.")
 
-    def validate_options_quota(self, options_quota):
+    @classmethod
+    def validate_options_quota(cls, options_quota):
         if not options_quota:
-            options_quota = self.options_quota
+            options_quota = cls.OPTIONS_QUOTA
         if options_quota > 50:
             raise ValueError("OptionsQuota must be no greater than 50.")
 
-    def validate_language_code(self, language_code):
-        if language_code not in self.var_filters_cg:
+    @classmethod
+    def validate_language_code(cls, language_code):
+        if language_code not in cls.VAR_FILTERS_CG:
             raise ValueError(f"Invalid language code: {language_code}")
 
+    @staticmethod
     def calculate_selling_price(
-        self, net_price: float, markup_percentage: float
+        net_price: float, markup_percentage: float
     ) -> float:
         """Calculate selling price based on markup percentage"""
         return net_price * (1 + markup_percentage / 100)
 
-    def validate_room_count(self, count):
-        if count > self.allowed_room_count:
+    @classmethod
+    def validate_room_count(cls, count):
+        if count > cls.ALLOWED_ROOM_COUNT:
             raise ValueError(
-                f"Number of rooms cannot exceed {self.allowed_room_count}."
+                f"Number of rooms cannot exceed {cls.ALLOWED_ROOM_COUNT}."
             )
 
-    def parse(self, xml_string: str):
+    @classmethod
+    def parse(cls, xml_string: str):
         # Parse the XML
-        root = ET.fromstring(xml_string)
+        root = etree.fromstring(xml_string.encode(), _get_parser())
 
         # Extract language
-        language_code = root.find(".//source/languageCode")
-        language_code = (
-            language_code.text
-            if language_code is not None
-            else DEFAULT_LANGUAGE
-        )
+        language_code = _LANGUAGE_CODE_XP(root) or cls.DEFAULT_LANGUAGE
         # Validate language
-        self.validate_language_code(language_code)
+        cls.validate_language_code(language_code)
 
         # Extract parameters (username, password, CompanyID)
-        parameters = root.find(".//Configuration/Parameters/Parameter")
+        parameters = _PARAMETER_XP(root)[0]
         password = parameters.get("password")
         username = parameters.get("username")
         company_id = parameters.get("CompanyID")
         # Validate user Details
-        self.validate_user(password, username, company_id)
-
-        # Extract and Validate destinations
-        search_type = root.find(".//SearchType").text
-        avail_destinations = root.findall(".//AvailDestinations")
-        self.validate_destination(search_type, avail_destinations)
+        cls.validate_user(password, username, company_id)
 
         # Extract and Validate Dates
-        start_date = root.find(".//StartDate").text
-        end_date = root.find(".//EndDate").text
-        start_date = datetime.strptime(start_date, "%d/%m/%Y")
-        end_date = datetime.strptime(end_date, "%d/%m/%Y")
+        start_date = _START_DATE_XP(root)
+        end_date = _END_DATE_XP(root)
+        start_date = _parse_ddmmyyyy(start_date)
+        end_date = _parse_ddmmyyyy(end_date)
+        cls.validate_date(start_date, end_date)
 
         # Extract and validate Option Quota
-        options_quota = root.find(".//optionsQuota").text
+        options_quota = _OPTIONS_QUOTA_XP(root)
         options_quota = int(options_quota) if options_quota else None
-        self.validate_options_quota(options_quota)
+        cls.validate_options_quota(options_quota)
+
+        # Extract and Validate destinations
+        search_type = _SEARCH_TYPE_XP(root)[0].text
+        avail_destinations = _AVAIL_DESTINATIONS_XP(root)
+        cls.validate_destination(search_type, avail_destinations)
 
         # Extract currency, nationality and market
-        currency = root.find(".//Currency").text
-        currency = (
-            currency
-            if currency in self.allowed_currencies
-            else self.default_currency
-        )
-        nationality = root.find(".//Nationality").text
-        nationality = (
-            nationality
-            if nationality in self.allowed_nationalities
-            else self.default_nationality
-        )
-        market = root.find(".//Market")
-        market = market.text if market is not None else self.default_market
+        # A missing element yields "", which is never an allowed value, so a
+        # single membership test covers both the missing and invalid cases
+        currency = _CURRENCY_XP(root)
+        if currency not in cls.ALLOWED_CURRENCIES:
+            currency = cls.DEFAULT_CURRENCY
+        nationality = _NATIONALITY_XP(root)
+        if nationality not in cls.ALLOWED_NATIONALITIES:
+            nationality = cls.DEFAULT_NATIONALITY
+        market = _MARKET_XP(root) or cls.DEFAULT_MARKET
 
         # Extract room and passenger information
-        paxes = root.findall(".//Paxes")
-        self.validate_room_count(len(paxes))
-        pax_data = []
+        paxes = _PAXES_XP(root)
+        cls.validate_room_count(len(paxes))
+        pax_ages = []
         for paxes_block in paxes:
-            pax_list = []
-            for pax in paxes_block.findall(".//Pax"):
-                age = int(pax.get("age", 0))  # Assuming `age` is an attribute
-                pax_type = "Child" if age <= self.max_child_age else "Adult"
-                pax_data.append({"age": age, "type": pax_type})
+            # Assuming `age` is an attribute
+            ages = [int(pax.get("age", 0)) for pax in paxes_block.iter("Pax")]
 
             # Validate the number of passengers per room
-            if len(pax_data) > self.allowed_room_guest_count:
+            if len(ages) > cls.ALLOWED_ROOM_GUEST_COUNT:
                 raise ValueError(
-                    f"Number of passengers in a room cannot exceed {self.allowed_room_guest_count}."
+                    f"Number of passengers in a room cannot exceed {cls.ALLOWED_ROOM_GUEST_COUNT}."
                 )
-
-            # Check for child validation (Children must have at least one accompanying adult)
-            child_count = sum(1 for pax in pax_data if pax["type"] == "Child")
-            adult_count = sum(1 for pax in pax_data if pax["type"] == "Adult")
+            pax_ages.append(ages)
 
         # Return data
         return {
@@ -165,47 +213,72 @@ class ParseAvailRequest:
             "market": market,
             "avail_destinations": avail_destinations,
             "paxes": paxes,
+            "pax_ages": pax_ages,
         }
 
-    def generate_response(self, data: Dict[str, Any]) -> str:
+    @classmethod
+    def generate_response(
+        cls, data: Dict[str, Any], pretty: bool = False
+    ) -> str:
         """Generate a JSON response based on the input data"""
-        response = []
-        id = 1
-        for destination in data["avail_destinations"]:
-            markup_percentage = 3.2
-            selling_price = self.calculate_selling_price(
-                self.price["net"], markup_percentage
-            )
-            # Build response object
-
-            response_item = {
+        # Every destination shares the same net price and markup, so the
+        # selling price is computed once for the whole batch
+        markup_percentage = 3.2
+        net_price = cls.PRICE["net"]
+        selling_price = cls.calculate_selling_price(
+            net_price, markup_percentage
+        )
+        # The price block is identical for every destination; build it once
+        # and give each response item its own copy
+        price = {
+            "minimumSellingPrice": None,
+            "currency": cls.PRICE["currency"],
+            "net": net_price,
+            "selling_price": selling_price,
+            "selling_currency": data["currency"],
+            "markup": markup_percentage,
+            "exchange_rate": 1.0,  # Assuming no exchange rate for simplicity
+        }
+        market = data["market"]
+        # Build response objects
+        response = [
+            {
                 "id": f"A#{id}",
                 "hotelCodeSupplier": "39971881",  # Example hotel code
-                "market": data["market"],
-                "price": {
-                    "minimumSellingPrice": None,
-                    "currency": self.price["currency"],
-                    "net": self.price["net"],
-                    "selling_price": selling_price,
-                    "selling_currency": data["currency"],
-                    "markup": markup_percentage,
-                    "exchange_rate": 1.0,  # Assuming no exchange rate for simplicity
-                },
+                "market": market,
+                "price": price.copy(),
             }
-            response.append(response_item)
-            id += 1
-        return json.dumps(response, indent=2)
+            for id, _ in enumerate(data["avail_destinations"], start=1)
+        ]
+        option = orjson.OPT_INDENT_2 if pretty else None
+        return orjson.dumps(response, option=option).decode()
 
-    def main(self, xml_request: str) -> str:
+    @classmethod
+    def main(cls, xml_request: str, pretty: bool = False) -> str:
         try:
-            data = self.parse(xml_request)
-            response = self.generate_response(data)
+            data = cls.parse(xml_request)
+            response = cls.generate_response(data, pretty)
             return response
         except ValueError as e:
-            return json.dumps({"error": str(e)})
+            # Only the message needs JSON escaping; the wrapper is fixed
+            return '{"error":' + orjson.dumps(str(e)).decode() + "}"
 
 
-xml_request = """<AvailRQ xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" xmlns:xsd="http://www.w3.org/2001/XMLSchema">
+def parse_avail_rq(xml_request: str, pretty: bool = False) -> str:
+    """Parse an AvailRQ document and return the JSON response"""
+    return ParseAvailRequest.main(xml_request, pretty)
+
+
+# Kept for existing `from assignment import parse; parse.main(xml)` callers
+parse = ParseAvailRequest()
+
+
+# Sample stay: starts a week from today and lasts 3 nights, so it passes
+# the date validation whenever the script is run
+sample_start_date = date.today() + timedelta(days=7)
+sample_end_date = sample_start_date + timedelta(days=3)
+
+xml_request = f"""<AvailRQ xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" xmlns:xsd="http://www.w3.org/2001/XMLSchema">
 <timeoutMilliseconds>25000</timeoutMilliseconds>
 <source>
 <languageCode>en</languageCode>
@@ -217,8 +290,8 @@ xml_request = """<AvailRQ xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance"
 </Parameters>
 </Configuration>
 <SearchType>Multiple</SearchType>
-<StartDate>14/10/2024</StartDate>
-<EndDate>16/10/2024</EndDate>
+<StartDate>{sample_start_date:%d/%m/%Y}</StartDate>
+<EndDate>{sample_end_date:%d/%m/%Y}</EndDate>
 <Currency>USD</Currency>
 <Nationality>US</Nationality>
 <AvailDestinations></AvailDestinations>
@@ -235,6 +308,5 @@ xml_request = """<AvailRQ xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance"
 </AvailRQ>"""
 
 
-parse = ParseAvailRequest()
-response = parse.main(xml_request)
+response = parse_avail_rq(xml_request, pretty=True)
 print(response)